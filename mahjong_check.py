@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+理牌最小手数ソルバーの検証
+双方向BFSで厳密な最小手数を求め、高速ソルバーの結果と突き合わせる
+"""
+
+import argparse
+import random
+import sys
+
+from mahjong_game import track_keep
+from mahjong_sort import bitparallel_min_moves, calculate_min_moves, lis_min_moves
+from mahjong_variant import STANDARD_SPEC, STANDARD_VARIANT, compile_variant
+
+
+# 赤五（0m/0p/0s）入りのバリアント：同順位の牌が存在するケースの検証用
+RED_FIVE_SPEC = {
+    'name': 'red-five',
+    'copies': 4,
+    'copies_per_tile': {'5m': 3, '0m': 1, '5p': 3, '0p': 1, '5s': 3, '0s': 1},
+    'groups': [
+        (suit, [f"{i}{suit}" for i in range(1, 5)] + [(f"5{suit}", f"0{suit}")]
+               + [f"{i}{suit}" for i in range(6, 10)])
+        for suit in ('m', 'p', 's')
+    ] + [STANDARD_SPEC['groups'][3]],
+    'group_order_free': True,
+}
+
+# 牌種の順序が固定のバリアント
+FIXED_ORDER_SPEC = dict(STANDARD_SPEC, name='fixed-order', group_order_free=False)
+
+# 検証対象のソルバー: (名前, 関数(tiles, variant))
+# 戻り値は calculate_min_moves と同じ形式
+SOLVERS = [
+    ('lis', lis_min_moves),
+    ('bitparallel', bitparallel_min_moves),
+    ('auto', calculate_min_moves),
+]
+
+
+def _tile_bits(variant):
+    """1牌あたりのビット数（バリアントのコードがすべて収まる幅）"""
+    return max(1, (len(variant.code_groups) - 1).bit_length())
+
+
+def _pack(codes, bits):
+    """コード列を1牌 bits ビットで整数に詰める（位置 0 が最下位）"""
+    state = 0
+    for k, code in enumerate(codes):
+        state |= code << (k * bits)
+    return state
+
+
+def _goal_states(tiles, variant, bits):
+    """完成形（各牌種順序でソートした配列）の集合"""
+    codes = variant.codes
+    goals = set()
+    for _, rank_map in variant.orders:
+        ordered = sorted(tiles, key=rank_map.__getitem__)
+        goals.add(_pack([codes[tile] for tile in ordered], bits))
+    return goals
+
+
+def _move_table(n, bits):
+    """
+    各移動 (i, j) を、1牌 bits ビットで詰めた整数へのマスク演算で表す表
+    moves[i] = [(j, 残す部分のマスク, ずらす部分のマスク, ずらす向き)]
+    j > i なら i+1～j を1牌分下へ、j < i なら j～i-1 を1牌分上へずらし、抜いた牌を j に置く
+    """
+    def span(a, b):
+        # 位置 a～b-1 のビット
+        return ((1 << ((b - a) * bits)) - 1) << (a * bits)
+
+    full = span(0, n)
+    moves = []
+    for i in range(n):
+        row = []
+        for j in range(n):
+            # j == i は移動なし、j == i - 1 は隣の牌を i に動かすのと同じ
+            if j == i or j == i - 1:
+                continue
+            if j > i:
+                row.append((j, full ^ span(i, j + 1), span(i, j), True))
+            else:
+                row.append((j, full ^ span(j, i + 1), span(j + 1, i + 1), False))
+        moves.append(row)
+    return moves
+
+
+def _expand(frontier, seen, other, moves, bits):
+    """
+    frontier を1手分展開する
+    other に到達したら True を返す（seen と frontier は更新しない）
+    """
+    n = len(moves)
+    mask = (1 << bits) - 1
+    next_frontier = []
+    append = next_frontier.append
+    for state in frontier:
+        down = state >> bits
+        up = state << bits
+        codes = [(state >> (k * bits)) & mask for k in range(n)]
+        for i, row in enumerate(moves):
+            tile = codes[i]
+            # 同じ牌が並んでいればどちらを抜いても同じ状態になる
+            if i and tile == codes[i - 1]:
+                continue
+            for j, keep, shift, to_right in row:
+                # 同じ牌の隣に挿入するのは、その牌の反対側に挿入するのと同じ
+                if to_right:
+                    if codes[j] == tile:
+                        continue
+                    moved = (state & keep) | (down & shift) | (tile << (j * bits))
+                else:
+                    if j and codes[j - 1] == tile:
+                        continue
+                    moved = (state & keep) | (up & shift) | (tile << (j * bits))
+                if moved in seen:
+                    continue
+                if moved in other:
+                    return True, None
+                seen.add(moved)
+                append(moved)
+    return False, next_frontier
+
+
+def exact_min_moves(tiles, variant=STANDARD_VARIANT, upper_bound=None):
+    """
+    1手 = 1枚を抜いて任意の位置に挿入、として完成形までの最小手数を
+    双方向BFSで厳密に求める
+    状態は1牌 _tile_bits(variant) ビットの整数に詰め、移動はシフトとマスクで作る
+    upper_bound: 実際に達成できると分かっている手数（verified_upper_bound の値）
+    与えると、両側の探索深さの和が upper_bound - 1 に達した時点で upper_bound を返す
+    （最後の1段は相手側との照合だけで済み、それより深い段は展開しない）
+    """
+    codes = variant.codes
+    bits = _tile_bits(variant)
+    start = _pack([codes[tile] for tile in tiles], bits)
+    goals = _goal_states(tiles, variant, bits)
+
+    if start in goals:
+        return 0
+    if upper_bound == 1:
+        return 1
+
+    # 移動は逆操作も1手なので、完成形側からも同じ展開で探索できる
+    moves = _move_table(len(tiles), bits)
+    forward_seen, forward = {start}, [start]
+    backward_seen, backward = set(goals), list(goals)
+    depth = 0
+
+    while forward and backward:
+        # 小さい方のフロンティアを展開する
+        depth += 1
+        if len(forward) <= len(backward):
+            found, forward = _expand(forward, forward_seen, backward_seen, moves, bits)
+        else:
+            found, backward = _expand(backward, backward_seen, forward_seen, moves, bits)
+        if found:
+            return depth
+        if upper_bound is not None and depth == upper_bound - 1:
+            # depth 手以内では届かないので、達成できる upper_bound が最小
+            return upper_bound
+
+    raise ValueError("完成形に到達できません")
+
+
+def verified_upper_bound(tiles, variant=STANDARD_VARIANT):
+    """
+    LISカーネルの結果を検証し、実際に達成できる手数を返す
+    残す牌が最適な牌種順序で広義増加なら、残りの牌を1枚ずつ挿入すれば完成する
+    検証できなければ None
+    """
+    if not tiles:
+        return 0
+    _, best_order, _, _, lis_indices = lis_min_moves(tiles, variant)
+    if any(not 0 <= k < len(tiles) for k in lis_indices):
+        return None
+    rank_map = variant.rank_map(best_order)
+    if any(a >= b or rank_map[tiles[a]] > rank_map[tiles[b]]
+           for a, b in zip(lis_indices, lis_indices[1:])):
+        return None
+    return len(tiles) - len(lis_indices)
+
+
+def check_solution(tiles, variant, result, expected):
+    """
+    ソルバーの結果を検証し、問題点のリストを返す（空なら正しい）
+    result: calculate_min_moves と同じ形式のタプル
+    expected: 厳密な最小手数
+    """
+    min_moves, best_order, lis_length, rank_array, lis_indices = result
+    errors = []
+
+    if min_moves != expected:
+        errors.append(f"最小手数 {min_moves} != 厳密解 {expected}")
+    if lis_length != len(tiles) - min_moves:
+        errors.append(f"LIS長 {lis_length} と手数 {min_moves} が矛盾")
+    if not tiles:
+        return errors
+
+    rank_map = variant.rank_map(best_order)
+    if rank_array != [rank_map[tile] for tile in tiles]:
+        errors.append("順位配列が最適な牌種順序と一致しない")
+    if len(lis_indices) != lis_length:
+        errors.append(f"残す牌の数 {len(lis_indices)} != LIS長 {lis_length}")
+    if any(a >= b for a, b in zip(lis_indices, lis_indices[1:])):
+        errors.append(f"残す牌の位置が昇順でない: {lis_indices}")
+    elif any(rank_map[tiles[a]] > rank_map[tiles[b]]
+             for a, b in zip(lis_indices, lis_indices[1:])):
+        errors.append(f"残す牌が順位順に並んでいない: {lis_indices}")
+
+    return errors
+
+
+def check_incremental(tiles, variant, result, expected):
+    """
+    差分更新（track_keep）の結果を検証し、問題点のリストを返す（空なら正しい）
+    result: track_keep の戻り値 (残す牌の位置集合, 牌種順序, 最小手数)
+    expected: 移動後の配牌の厳密な最小手数
+    """
+    keep, order, min_moves = result
+    errors = []
+
+    if min_moves != expected:
+        errors.append(f"最小手数 {min_moves} != 厳密解 {expected}")
+    kept = sorted(keep)
+    if len(kept) != len(tiles) - min_moves:
+        errors.append(f"残す牌の数 {len(kept)} != 枚数 - 手数 {len(tiles) - min_moves}")
+    if any(not 0 <= k < len(tiles) for k in kept):
+        errors.append(f"残す牌の位置が範囲外: {kept}")
+    else:
+        rank_map = variant.rank_map(order)
+        if any(rank_map[tiles[a]] > rank_map[tiles[b]] for a, b in zip(kept, kept[1:])):
+            errors.append(f"残す牌が順位順に並んでいない: {kept}")
+
+    return errors
+
+
+def random_hand(rng, variant, n):
+    """
+    検証用の配牌を生成
+    半分は山からそのまま、半分は少ない牌種から引いて重複を多くする
+    """
+    if rng.random() < 0.5:
+        return rng.sample(variant.wall, n)
+    pool = rng.sample(variant.tiles, rng.randint(1, 6))
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def fuzz(cases=1000, min_tiles=0, max_tiles=8, seed=0, variants=None, out=None):
+    """
+    ランダムな配牌で全ソルバーを厳密解と比較する
+    配牌の枚数は min_tiles～max_tiles からランダムに選ぶ
+    out: 不一致の出力先（省略時は標準出力）
+    戻り値: 不一致の件数
+    """
+    out = out or sys.stdout
+    if variants is None:
+        variants = [STANDARD_VARIANT, compile_variant(RED_FIVE_SPEC),
+                    compile_variant(FIXED_ORDER_SPEC)]
+
+    rng = random.Random(seed)
+    failures = 0
+
+    def report(name, variant, tiles, errors):
+        print(f"[{name}] {variant.name} {' '.join(tiles)}", file=out)
+        for error in errors:
+            print(f"    {error}", file=out)
+
+    for case in range(cases):
+        variant = variants[case % len(variants)]
+        tiles = random_hand(rng, variant, rng.randint(min_tiles, max_tiles))
+        expected = exact_min_moves(tiles, variant, verified_upper_bound(tiles, variant))
+
+        for name, solver in SOLVERS:
+            errors = check_solution(tiles, variant, solver(tiles, variant), expected)
+            if errors:
+                failures += 1
+                report(name, variant, tiles, errors)
+
+        # 差分更新：ゲームと同じく最適解の残す牌から1手動かし、移動後の厳密解と比べる
+        if len(tiles) < 2:
+            continue
+        _, order, _, _, lis_indices = calculate_min_moves(tiles, variant)
+        from_pos, to_pos = rng.sample(range(len(tiles)), 2)
+        moved = list(tiles)
+        moved.insert(to_pos, moved.pop(from_pos))
+        result = track_keep(moved, set(lis_indices), order, from_pos, to_pos, variant)
+        expected = exact_min_moves(moved, variant, verified_upper_bound(moved, variant))
+        errors = check_incremental(moved, variant, result, expected)
+        if errors:
+            failures += 1
+            report(f"incremental {from_pos}->{to_pos}", variant, tiles, errors)
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="理牌ソルバーを厳密解と比較する")
+    parser.add_argument("--cases", type=int, default=1000, help="検証する配牌の数")
+    parser.add_argument("--min-tiles", type=int, default=0, help="配牌の最小枚数")
+    parser.add_argument("--max-tiles", type=int, default=8, help="配牌の最大枚数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    failures = fuzz(args.cases, args.min_tiles, args.max_tiles, args.seed)
+    solvers = ", ".join([name for name, _ in SOLVERS] + ['incremental'])
+    print(f"{args.cases}件 × ソルバー[{solvers}]: 不一致 {failures}件")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,35 +6,20 @@
 スコア = 手数 × 時間（秒）で評価（低いほど良い）
 """
 
-import random
+import argparse
 import time
+import unicodedata
 
+from mahjong_sort import calculate_min_moves
+from mahjong_variant import STANDARD_VARIANT
 
-def generate_random_tiles(n=13):
+
+def generate_random_tiles(n=13, variant=STANDARD_VARIANT):
     """
     ランダムに n 枚の麻雀牌を生成
-    麻雀牌は各4枚ずつ存在
+    麻雀牌は各4枚ずつ存在（バリアントの定義に従う）
     """
-    all_tiles = []
-
-    # 萬子 1m～9m
-    for i in range(1, 10):
-        all_tiles.extend([f"{i}m"] * 4)
-
-    # 筒子 1p～9p
-    for i in range(1, 10):
-        all_tiles.extend([f"{i}p"] * 4)
-
-    # 索子 1s～9s
-    for i in range(1, 10):
-        all_tiles.extend([f"{i}s"] * 4)
-
-    # 字牌 1z～7z（東南西北白発中）
-    for i in range(1, 8):
-        all_tiles.extend([f"{i}z"] * 4)
-
-    # ランダムに n 枚を選択
-    return random.sample(all_tiles, n)
+    return variant.generate(n)
 
 
 def display_tile(tile):
@@ -53,72 +38,28 @@ def display_tile(tile):
         # 字牌 (1z-7z: 東南西北白發中)
         '1z': '🀀', '2z': '🀁', '3z': '🀂', '4z': '🀃',
         '5z': '🀆', '6z': '🀅', '7z': '🀄',
+        # 赤五 (0m/0p/0s)：専用の絵文字がないので五に「赤」を付ける
+        '0m': '赤🀋', '0p': '赤🀝', '0s': '赤🀔',
     }
     return emoji_map.get(tile, tile)
 
 
-def get_tile_sort_key(tile):
+def get_tile_sort_key(tile, variant=STANDARD_VARIANT):
     """
     牌のソートキーを返す
-    順序：萬子(m) < 筒子(p) < 索子(s) < 字牌(z)
-    各牌種内は数字順
+    順序：バリアントの定義順（標準は 萬子(m) < 筒子(p) < 索子(s) < 字牌(z)）
+    各牌種内はグループ内順序
     """
-    suit = tile[1]
-    num = int(tile[0])
+    return variant.sort_key(tile)
 
-    suit_order = {'m': 0, 'p': 1, 's': 2, 'z': 3}
-    return (suit_order[suit], num)
 
-
-def is_sorted(tiles):
+def is_sorted(tiles, variant=STANDARD_VARIANT):
     """
     牌が正しくソートされているかチェック
     条件：同じ種類の牌がグループ化され、各グループ内で数字順にソートされている
-    グループの順序は任意でOK
+    グループの順序は任意でOK（バリアントで固定されていなければ）
     """
-    if not tiles:
-        return True
-
-    # 連続する同じ種類の牌をグループ化
-    groups = []
-    current_group = [tiles[0]]
-
-    for i in range(1, len(tiles)):
-        current_suit = tiles[i][1]  # 牌種（m/p/s/z）
-        prev_suit = tiles[i-1][1]
-
-        if current_suit == prev_suit:
-            # 同じ種類なら現在のグループに追加
-            current_group.append(tiles[i])
-        else:
-            # 種類が変わったら新しいグループを開始
-            groups.append(current_group)
-            current_group = [tiles[i]]
-
-    # 最後のグループを追加
-    groups.append(current_group)
-
-    # 各グループ内がソートされているかチェック
-    seen_suits = set()
-    for group in groups:
-        # グループの種類を取得
-        suit = group[0][1]
-
-        # 同じ種類が既に出現していたらNG（種類が分かれている）
-        if suit in seen_suits:
-            return False
-        seen_suits.add(suit)
-
-        # グループ内で数字が増加順になっているかチェック
-        for i in range(len(group) - 1):
-            num_current = int(group[i][0])
-            num_next = int(group[i+1][0])
-
-            # グループ内で数字が増加していない場合はNG
-            if num_current > num_next:
-                return False
-
-    return True
+    return variant.is_sorted(tiles)
 
 
 def display_tiles_with_index(tiles):
@@ -180,12 +121,375 @@ def calculate_score(moves, elapsed_time):
     return moves * elapsed_time
 
 
+def _closest_keep(rank_array, prefer):
+    """
+    最長の広義増加部分列のうち、prefer に含まれる位置をなるべく多く使うものを O(n²) で求める
+    各位置の重みを n + 1（prefer なら n + 2）とすれば、重み最大の列は最長かつ prefer と最も重なる
+    """
+    n = len(rank_array)
+    weight = [n + 1 + (k in prefer) for k in range(n)]
+    total = weight[:]
+    parent = [-1] * n
+
+    for k in range(n):
+        for p in range(k):
+            if rank_array[p] <= rank_array[k] and total[p] + weight[k] > total[k]:
+                total[k] = total[p] + weight[k]
+                parent[k] = p
+
+    keep = set()
+    current = max(range(n), key=total.__getitem__, default=-1)
+    while current != -1:
+        keep.add(current)
+        current = parent[current]
+    return keep
+
+
+def track_keep(tiles, keep, order, from_pos, to_pos, variant=STANDARD_VARIANT):
+    """
+    牌を from_pos から to_pos に動かした後の「動かさなくて良い牌」の位置集合を求める
+    keep, order: 移動前の位置集合と牌種順序
+    移動前の集合を位置だけずらして使い続け、最適でなくなったときだけ求め直す
+    求め直すときも同じ手数なら牌種順序は変えず、移動前の集合となるべく重なるものを選ぶ
+    戻り値: (位置集合, 牌種順序, 最小手数)
+    """
+    min_moves, best_order, _, _, _ = calculate_min_moves(tiles, variant)
+    optimal_length = len(tiles) - min_moves
+
+    def shifted(k):
+        if from_pos < k <= to_pos:
+            return k - 1
+        if to_pos <= k < from_pos:
+            return k + 1
+        return k
+
+    # 動かした牌以外の並びは変わらないので、残りはそのまま増加部分列になっている
+    carried = {shifted(k) for k in keep if k != from_pos}
+    if order is not None:
+        rank_map = variant.rank_map(order)
+        rank = rank_map[tiles[to_pos]]
+        lower = max((k for k in carried if k < to_pos), default=None)
+        upper = min((k for k in carried if k > to_pos), default=None)
+        if ((lower is None or rank_map[tiles[lower]] <= rank)
+                and (upper is None or rank <= rank_map[tiles[upper]])):
+            carried.add(to_pos)
+
+        if len(carried) == optimal_length:
+            return carried, order, min_moves
+
+        closest = _closest_keep([rank_map[t] for t in tiles], carried)
+        if len(closest) == optimal_length:
+            return closest, order, min_moves
+
+    rank_map = variant.rank_map(best_order)
+    return _closest_keep([rank_map[t] for t in tiles], carried), best_order, min_moves
+
+
+# curses 表示で1牌あたりに使う桁数
+CELL_WIDTH = 4
+
+
+class TerminalError(Exception):
+    """端末が curses 表示に対応していない"""
+
+
+class TerminfoWriter:
+    """
+    curses を通さず、terminfo の制御シーケンスで端末に直接書き出す
+    curses が把握しているカーソル位置と属性を崩さないよう、1回の書き出しを sc/rc で囲む
+    put: 制御シーケンス（bytes）を出力する関数（curses.putp なら curses の出力と順序が揃う）
+    """
+
+    REQUIRED = ('cup', 'sc', 'rc', 'sgr0')
+
+    def __init__(self, put):
+        import curses
+
+        self.put = put
+        self._tparm = curses.tparm
+        self.caps = {name: curses.tigetstr(name) for name in
+                     ('cup', 'sc', 'rc', 'sgr0', 'ich', 'ich1', 'smir', 'rmir', 'dch', 'dch1',
+                      'bold', 'dim', 'smul', 'rev', 'setaf')}
+        missing = [name for name in self.REQUIRED if not self.caps[name]]
+        if missing:
+            raise TerminalError(f"端末が必要な機能に対応していません: {', '.join(missing)}")
+
+        caps = self.caps
+        # 文字の挿入・削除（幅を引数に取る版がなければ1文字版か挿入モードで代用する）
+        self.can_shift = bool((caps['ich'] or caps['ich1'] or caps['smir'])
+                              and (caps['dch'] or caps['dch1']))
+
+        self.styles = {
+            'keep': caps['bold'] or b'',
+            'move': caps['dim'] or b'',
+            'selected': caps['smul'] or b'',
+            'cursor': caps['rev'] or b'',
+        }
+        if caps['setaf'] and curses.tigetnum('colors') >= 8:
+            self.styles['keep'] += self._tparm(caps['setaf'], curses.COLOR_GREEN)
+            self.styles['move'] = self._tparm(caps['setaf'], curses.COLOR_YELLOW)
+
+    def _write(self, y, x, body):
+        caps = self.caps
+        self.put(caps['sc'] + self._tparm(caps['cup'], y, x) + body + caps['sgr0'] + caps['rc'])
+
+    def text(self, y, x, text, style=b''):
+        """(y, x) に style の属性で text を書く"""
+        self._write(y, x, self.caps['sgr0'] + style + text.encode())
+
+    def delete(self, y, x, width):
+        """(y, x) から width 文字を削除し、行の残りを左に詰める"""
+        caps = self.caps
+        if caps['dch']:
+            body = self._tparm(caps['dch'], width)
+        else:
+            body = caps['dch1'] * width
+        self._write(y, x, body)
+
+    def insert(self, y, x, width):
+        """(y, x) に width 文字の空白を挿入し、行の残りを右にずらす"""
+        caps = self.caps
+        if caps['ich']:
+            body = self._tparm(caps['ich'], width)
+        elif caps['ich1']:
+            body = caps['ich1'] * width
+        else:
+            body = caps['smir'] + b' ' * width + (caps['rmir'] or b'')
+        self._write(y, x, body)
+
+
+class CursesHandView:
+    """
+    curses で手牌を描画するビュー
+    位置の行と見出しは curses、牌の行は term（TerminfoWriter）で端末に直接描画する
+    curses の画面上の牌の行は空白のままなので、curses がこの行を書き換えることはない
+    前回描画したセルを覚えておき、変化したセルだけを書き換える
+    attrs: 'keep', 'move', 'selected', 'cursor' の表示属性（TerminfoWriter.styles）
+    """
+
+    TOP = 2  # 位置の行（次の行が牌の行）
+    LEFT = 8  # 最初のセルの桁
+
+    @classmethod
+    def size(cls, n, top=TOP, left=LEFT):
+        """n 枚の手牌の描画に必要な (幅, 高さ)"""
+        return left + n * CELL_WIDTH, top + 2
+
+    def __init__(self, stdscr, term, n, attrs, top=TOP, left=LEFT):
+        self.stdscr = stdscr
+        self.term = term
+        self.top = top
+        self.left = left
+        self.attrs = attrs
+        self.cells = [None] * n  # cells[i] = 端末に描画してある (牌, 属性)
+        self.lines = {}  # lines[y] = 前回描画した (文字列, 属性)
+
+        # 位置の行と見出しは手牌の枚数が変わらない限り不変なので一度だけ描画
+        self.stdscr.addstr(top, 0, "位置")
+        self.stdscr.addstr(top + 1, 0, "牌")
+        for i in range(n):
+            self.stdscr.addstr(top, self._x(i), f"{i:2d}")
+        # 最初の refresh は画面を消去するので、牌の行を書く前に済ませておく
+        self.stdscr.refresh()
+
+    def _x(self, i):
+        return self.left + i * CELL_WIDTH
+
+    def draw_cell(self, i, tile, attr):
+        """セル i を描画（前回と同じなら何もしない）"""
+        if self.cells[i] == (tile, attr):
+            return
+        self.cells[i] = (tile, attr)
+        self.term.text(self.top + 1, self._x(i), f"{tile:3s}", attr)
+
+    def draw_line(self, y, text, attr=0):
+        """行 y を描画（前回と同じなら何もしない）"""
+        if self.lines.get(y) == (text, attr):
+            return
+        self.lines[y] = (text, attr)
+        self.stdscr.move(y, 0)
+        self.stdscr.clrtoeol()
+        self.stdscr.addstr(y, 0, text, attr)
+
+    def invalidate(self):
+        """画面全体が描き直された後に呼ぶ（次の render で牌の行をすべて描画する）"""
+        self.cells = [None] * len(self.cells)
+
+    def move_cell(self, from_pos, to_pos):
+        """
+        牌を from_pos から to_pos に動かしたことを反映する
+        端末の文字削除で from_pos のセルを詰め、文字挿入で to_pos に空きを作るので、
+        間の牌は端末側でずれ、出力量は手牌の枚数や移動距離によらず一定
+        端末が文字の挿入・削除に対応していなければ、ずれた範囲を次の render で描き直す
+        """
+        if not self.term.can_shift:
+            for k in range(min(from_pos, to_pos), max(from_pos, to_pos) + 1):
+                self.cells[k] = None
+            return
+
+        y = self.top + 1
+        self.term.delete(y, self._x(from_pos), CELL_WIDTH)
+        self.term.insert(y, self._x(to_pos), CELL_WIDTH)
+        self.cells.pop(from_pos)
+        self.cells.insert(to_pos, None)
+
+    def render(self, tiles, keep, cursor, selected):
+        """
+        手牌を描画
+        keep: ソルバーが動かさない牌の位置集合
+        cursor: カーソル位置, selected: 選択中の牌の位置（なければ None）
+        """
+        attrs = self.attrs
+        for i, tile in enumerate(tiles):
+            attr = attrs['keep'] if i in keep else attrs['move']
+            if i == selected:
+                attr += attrs['selected']
+            if i == cursor:
+                attr += attrs['cursor']
+            self.draw_cell(i, tile, attr)
+
+
+# curses 表示の1行目に出す操作説明
+CURSES_HEADER = "麻雀理牌ゲーム  ←→: 移動  Space/Enter: 選択・配置  Esc: 取消  q: 終了"
+
+
+def _text_width(text):
+    """端末上の表示幅（全角は2桁）"""
+    return sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+
+
+def _check_screen_size(stdscr, n):
+    """
+    操作説明・手牌・状態とメッセージの2行が画面に収まるか確認し、収まらなければ TerminalError
+    （メッセージは操作説明より短い）
+    """
+    height, width = stdscr.getmaxyx()
+    hand_width, hand_height = CursesHandView.size(n)
+    need_width = max(_text_width(CURSES_HEADER), hand_width)
+    need_height = hand_height + 3
+    if width < need_width or height < need_height:
+        raise TerminalError(
+            f"端末が小さすぎます（{n}枚には {need_width}×{need_height} 以上が必要、"
+            f"現在 {width}×{height}）。端末を広げるか --tiles で枚数を減らしてください")
+
+
+def _play_curses(stdscr, tiles, variant=STANDARD_VARIANT):
+    """
+    curses 上でゲームを進行する
+    戻り値: (手数, 経過時間, 完成したか)
+    """
+    import curses
+
+    curses.curs_set(0)
+    stdscr.keypad(True)
+    _check_screen_size(stdscr, len(tiles))
+    stdscr.addstr(0, 0, CURSES_HEADER)
+    term = TerminfoWriter(curses.putp)
+    view = CursesHandView(stdscr, term, len(tiles), term.styles)
+    status_y = view.top + 3
+    message_y = status_y + 1
+
+    start_time = time.time()
+    moves = 0
+    cursor = 0
+    selected = None
+    message = "動かす牌を選択してください（緑の牌は動かさなくて良い牌）"
+    min_moves, order, _, _, lis_indices = calculate_min_moves(tiles, variant)
+    keep = set(lis_indices)
+
+    while True:
+        view.render(tiles, keep, cursor, selected)
+        view.draw_line(status_y, f"手数: {moves}  残り最小手数: {min_moves}")
+        view.draw_line(message_y, message)
+        stdscr.refresh()
+
+        if is_sorted(tiles, variant):
+            return moves, time.time() - start_time, True
+
+        key = stdscr.getch()
+
+        if key in (curses.KEY_LEFT, ord('h')):
+            cursor = max(cursor - 1, 0)
+        elif key in (curses.KEY_RIGHT, ord('l')):
+            cursor = min(cursor + 1, len(tiles) - 1)
+        elif key in (curses.KEY_HOME,):
+            cursor = 0
+        elif key in (curses.KEY_END,):
+            cursor = len(tiles) - 1
+        elif key == 27:  # Esc
+            selected = None
+            message = "選択を取り消しました"
+        elif key in (ord(' '), ord('\n'), curses.KEY_ENTER):
+            if selected is None:
+                selected = cursor
+                message = f"位置 {selected} の {tiles[selected]} を選択中。移動先を選んでください"
+            elif selected == cursor:
+                selected = None
+                message = "選択を取り消しました"
+            else:
+                from_pos, to_pos = selected, cursor
+                moved_tile = tiles.pop(from_pos)
+                tiles.insert(to_pos, moved_tile)
+                view.move_cell(from_pos, to_pos)
+                keep, order, min_moves = track_keep(tiles, keep, order, from_pos, to_pos,
+                                                    variant)
+                moves += 1
+                selected = None
+                message = f"✓ 位置 {from_pos} の {moved_tile} を位置 {to_pos} に移動しました"
+        elif key == curses.KEY_RESIZE:
+            # curses が画面を描き直すと牌の行は消えるので、描き直させてから全セルを描画する
+            _check_screen_size(stdscr, len(tiles))
+            stdscr.refresh()
+            view.invalidate()
+        elif key in (ord('q'), ord('Q')):
+            return moves, time.time() - start_time, False
+
+
+def curses_main(n=13, variant=STANDARD_VARIANT):
+    """curses による差分描画モードで n 枚のゲームを実行"""
+    import curses
+
+    tiles = generate_random_tiles(n, variant)
+    try:
+        moves, elapsed_time, completed = curses.wrapper(_play_curses, tiles, variant)
+    except TerminalError as e:
+        print(f"エラー: {e}")
+        return
+
+    if not completed:
+        print("未完了のままゲームを終了しました")
+        return
+
+    score = calculate_score(moves, elapsed_time)
+    print("=" * 70)
+    print("🎉 おめでとうございます！理牌完成！")
+    print("=" * 70)
+    display_tiles_with_index(tiles)
+    print()
+    print(f"手数: {moves}手")
+    print(f"時間: {elapsed_time:.2f}秒")
+    print(f"スコア: {score:.2f} （手数 × 時間）")
+    print("=" * 70)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="麻雀理牌ゲーム")
+    parser.add_argument("--curses", action="store_true", help="curses による差分描画モードで遊ぶ")
+    parser.add_argument("--tiles", type=int, default=13, help="配牌の枚数")
+    args = parser.parse_args()
+    if not 1 <= args.tiles <= len(STANDARD_VARIANT.wall):
+        parser.error(f"--tiles は 1～{len(STANDARD_VARIANT.wall)} で指定してください")
+    n = args.tiles
+
+    if args.curses:
+        curses_main(n)
+        return
+
     print("=" * 70)
     print("麻雀理牌ゲーム")
     print("=" * 70)
     print("\nルール:")
-    print("  - ランダムに配られた13枚の牌を、各牌種ごとにソートしてください")
+    print(f"  - ランダムに配られた{n}枚の牌を、各牌種ごとにソートしてください")
     print("  - 同じ種類の牌をまとめて、各グループ内を数字順に並べます")
     print("  - 牌種の順序は任意です（例：萬→筒→索→字でも、筒→字→萬→索でもOK）")
     print("  - 各牌種内は数字順（1～9、字牌は東南西北白發中）")
@@ -193,8 +497,8 @@ def main():
     print("  - スコアが低いほど優秀です！")
     print()
 
-    # ランダムに13牌を生成
-    tiles = generate_random_tiles(13)
+    # ランダムに n 牌を生成
+    tiles = generate_random_tiles(n)
 
     print("【初期配牌】")
     display_tiles_with_index(tiles)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+麻雀牌のルール定義（バリアント）
+牌の集合・枚数・牌種グループ・グループ内順序を宣言的に記述し、
+一度だけコンパイルして整数の順位テーブルと判定関数を作る
+"""
+
+import random
+from itertools import permutations
+
+
+# 標準ルール：萬子・筒子・索子・字牌 各4枚、牌種の順序は任意
+# groups の各要素は (グループ名, グループ内順序)
+# グループ内順序の要素をタプルにすると同順位の牌になる（例: ('5m', '0m') で赤五萬）
+STANDARD_SPEC = {
+    'name': 'standard',
+    'copies': 4,
+    'groups': [
+        ('m', [f"{i}m" for i in range(1, 10)]),
+        ('p', [f"{i}p" for i in range(1, 10)]),
+        ('s', [f"{i}s" for i in range(1, 10)]),
+        ('z', [f"{i}z" for i in range(1, 8)]),  # 東南西北白発中
+    ],
+    'group_order_free': True,
+}
+
+
+class Variant:
+    """
+    コンパイル済みのバリアント
+    generate / rank_map / sort_key / is_sorted を提供する
+    """
+
+    def __init__(self, spec):
+        self.name = spec.get('name', '')
+        self.group_order_free = spec.get('group_order_free', True)
+
+        default_copies = spec.get('copies', 4)
+        copies_per_tile = spec.get('copies_per_tile', {})
+
+        group_keys = []
+        tiles = []
+        sort_keys = {}  # sort_keys[tile] = (グループ番号, グループ内順位)
+        group_sizes = []  # group_sizes[g] = グループ g の順位の数
+
+        for g, (key, order) in enumerate(spec['groups']):
+            if key in group_keys:
+                raise ValueError(f"グループ {key} が重複しています")
+            group_keys.append(key)
+
+            for pos, entry in enumerate(order):
+                same_rank = (entry,) if isinstance(entry, str) else tuple(entry)
+                for tile in same_rank:
+                    if tile in sort_keys:
+                        raise ValueError(f"牌 {tile} が重複しています")
+                    sort_keys[tile] = (g, pos)
+                    tiles.append(tile)
+            group_sizes.append(len(order))
+
+        for tile in copies_per_tile:
+            if tile not in sort_keys:
+                raise ValueError(f"牌 {tile} は定義されていません")
+
+        self.group_keys = tuple(group_keys)
+        self.tiles = tuple(tiles)
+        self.sort_keys = sort_keys
+
+        # 定義順の整数コード（同順位の牌は同じコード）と、コードごとのグループ番号
+        distinct_keys = sorted(set(sort_keys.values()))
+        code_of_key = {key: code for code, key in enumerate(distinct_keys)}
+        self.codes = {tile: code_of_key[key] for tile, key in sort_keys.items()}
+        self.code_groups = tuple(g for g, _ in distinct_keys)
+        self.wall = tuple(tile for tile in tiles
+                          for _ in range(copies_per_tile.get(tile, default_copies)))
+
+        # 牌種順序ごとの順位テーブル（順位は1始まり、create_rank_map と同じ）
+        if self.group_order_free:
+            group_orders = tuple(permutations(range(len(group_keys))))
+        else:
+            group_orders = (tuple(range(len(group_keys))),)
+
+        orders = []
+        for group_order in group_orders:
+            offset = {}
+            rank = 1
+            for g in group_order:
+                offset[g] = rank
+                rank += group_sizes[g]
+            rank_map = {tile: offset[g] + pos for tile, (g, pos) in sort_keys.items()}
+            orders.append((tuple(group_keys[g] for g in group_order), rank_map))
+
+        # orders[k] = (牌種順序, 順位テーブル)、group_orders[k] はそのグループ番号版
+        self.orders = tuple(orders)
+        self.group_orders = group_orders
+        self._rank_maps = dict(orders)
+
+    def generate(self, n=13):
+        """山からランダムに n 枚の牌を選ぶ"""
+        return random.sample(self.wall, n)
+
+    def rank_map(self, group_order):
+        """牌種順序に対応する順位テーブル（共有されるので変更しないこと）"""
+        return self._rank_maps[tuple(group_order)]
+
+    def sort_key(self, tile):
+        """定義順（グループ順 → グループ内順）のソートキー"""
+        return self.sort_keys[tile]
+
+    def is_sorted(self, tiles):
+        """
+        牌が正しくソートされているかチェック
+        条件：同じグループの牌が連続し、各グループ内でグループ内順序に従っている
+        group_order_free でなければグループの順序も定義順に従う
+        """
+        sort_keys = self.sort_keys
+        seen_groups = set()
+        prev_group = None
+        prev_pos = 0
+
+        for tile in tiles:
+            g, pos = sort_keys[tile]
+
+            if g == prev_group:
+                # グループ内で順序が逆転していたらNG
+                if pos < prev_pos:
+                    return False
+            else:
+                # 同じグループが既に出現していたらNG（グループが分かれている）
+                if g in seen_groups:
+                    return False
+                if not self.group_order_free and prev_group is not None and g < prev_group:
+                    return False
+                seen_groups.add(g)
+                prev_group = g
+
+            prev_pos = pos
+
+        return True
+
+
+def compile_variant(spec):
+    """バリアント定義をコンパイルする"""
+    return Variant(spec)
+
+
+STANDARD_VARIANT = compile_variant(STANDARD_SPEC)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+理牌ソルバーと厳密解（mahjong_check.fuzz）の突き合わせ
+シードを固定しているので、毎回同じ配牌を検証する
+"""
+
+import io
+import random
+
+import mahjong_check
+from mahjong_check import exact_min_moves, fuzz
+from mahjong_sort import calculate_min_moves, lis_min_moves
+from mahjong_variant import compile_variant
+
+
+def test_fuzz_small_hands():
+    assert fuzz(cases=3000, max_tiles=8, seed=0) == 0
+
+
+def test_fuzz_large_hands():
+    # 10～12枚は厳密解の探索が重い（1件数秒かかる配牌もある）ので件数を絞る
+    assert fuzz(cases=30, min_tiles=10, max_tiles=12, seed=1) == 0
+
+
+def test_fuzz_catches_stale_incremental_keep(monkeypatch):
+    # 移動前の残す牌をずらすだけで求め直さない差分更新は、不一致として報告される
+    def stale_track_keep(tiles, keep, order, from_pos, to_pos, variant):
+        shifted = {k - (from_pos < k <= to_pos) + (to_pos <= k < from_pos)
+                   for k in keep if k != from_pos}
+        return shifted, order, calculate_min_moves(tiles, variant)[0]
+
+    monkeypatch.setattr(mahjong_check, 'track_keep', stale_track_keep)
+    out = io.StringIO()
+    assert fuzz(cases=300, max_tiles=8, seed=0, out=out) > 0
+    assert "[incremental" in out.getvalue()
+
+
+# 64種類以上のコードを持つバリアント（1牌のビット数がバリアントで変わることの検証用）
+WIDE_SPEC = {
+    'name': 'wide',
+    'copies': 2,
+    'groups': [(suit, [f"{i}{suit}" for i in range(1, 41)]) for suit in ('a', 'b')],
+    'group_order_free': True,
+}
+
+
+def test_exact_min_moves_on_wide_variant():
+    variant = compile_variant(WIDE_SPEC)
+    assert len(variant.code_groups) == 80
+    tiles = ['29b', '15a', '33b', '22b', '34a']
+    assert exact_min_moves(tiles, variant) == lis_min_moves(tiles, variant)[0] == 2
+
+    rng = random.Random(0)
+    for _ in range(300):
+        tiles = rng.sample(variant.wall, rng.randint(2, 6))
+        assert exact_min_moves(tiles, variant) == lis_min_moves(tiles, variant)[0]
+    assert fuzz(cases=300, max_tiles=7, seed=1, variants=[variant]) == 0
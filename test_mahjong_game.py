@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+curses 差分描画（CursesHandView / track_keep）のテスト
+curses を使わず、呼び出しを記録する偽の画面で描画量を数える
+"""
+
+import os
+import random
+
+import pytest
+
+from mahjong_game import (CursesHandView, TerminalError, TerminfoWriter, _check_screen_size,
+                          display_tile, generate_random_tiles, get_tile_sort_key, is_sorted,
+                          track_keep)
+from mahjong_sort import calculate_min_moves
+from mahjong_variant import STANDARD_SPEC, STANDARD_VARIANT, compile_variant
+
+ATTRS = {'keep': b'K', 'move': b'M', 'selected': b'S', 'cursor': b'C'}
+
+
+class FakeScreen:
+    """stdscr の代わり（位置の行などの curses 側の描画を受け流す）"""
+
+    def __init__(self, height=24, width=80):
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, y, x, text, attr=0):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+
+class FakeTerminal:
+    """TerminfoWriter の代わりに牌の行への書き出しを記録する"""
+
+    def __init__(self, can_shift=True):
+        self.can_shift = can_shift
+        self.calls = []
+
+    def text(self, y, x, text, style=b''):
+        self.calls.append('text')
+
+    def delete(self, y, x, width):
+        self.calls.append('delete')
+
+    def insert(self, y, x, width):
+        self.calls.append('insert')
+
+    def take(self):
+        calls, self.calls = self.calls, []
+        return calls
+
+
+def optimal_move(tiles, keep, order):
+    """残す牌の列に動かす牌を1枚組み込む移動（最小手数を1減らす移動）"""
+    rank_map = STANDARD_VARIANT.rank_map(order)
+    from_pos = random.choice([i for i in range(len(tiles)) if i not in keep])
+    rank = rank_map[tiles[from_pos]]
+    # 抜いた後の位置で、順位が rank 以下の最後の残す牌の直後に入れる
+    kept = [k - (k > from_pos) for k in sorted(keep) if rank_map[tiles[k]] <= rank]
+    return from_pos, kept[-1] + 1 if kept else 0
+
+
+def play_optimal_moves(n, term, count):
+    """
+    最小手数を1減らす移動を count 回（最大）行い、1手ごとの牌の行への書き出しを返す
+    ゲームと同じく、選択した牌の上で移動先を決めて配置する
+    """
+    moves = []
+    while len(moves) < count:
+        tiles = STANDARD_VARIANT.generate(n)
+        min_moves, order, _, _, lis_indices = calculate_min_moves(tiles)
+        keep = set(lis_indices)
+        view = CursesHandView(FakeScreen(), term, n, ATTRS)
+        for _ in range(min_moves):
+            from_pos, to_pos = optimal_move(tiles, keep, order)
+            view.render(tiles, keep, to_pos, from_pos)
+            term.take()
+
+            tiles.insert(to_pos, tiles.pop(from_pos))
+            view.move_cell(from_pos, to_pos)
+            new_keep, new_order, new_min_moves = track_keep(tiles, keep, order, from_pos, to_pos)
+            view.render(tiles, new_keep, to_pos, None)
+            moves.append((from_pos, to_pos, term.take()))
+
+            # 牌種順序も残す牌も変わらず、動かした牌が加わるだけ
+            assert new_min_moves == min_moves - 1
+            assert new_order == order
+            shifted = {k - (from_pos < k <= to_pos) + (to_pos <= k < from_pos) for k in keep}
+            assert new_keep == shifted | {to_pos}
+            keep, min_moves = new_keep, new_min_moves
+    return moves
+
+
+def test_cursor_and_selection_touch_fixed_cells():
+    random.seed(1)
+    for n in (13, 40):
+        tiles = STANDARD_VARIANT.generate(n)
+        keep = set(calculate_min_moves(tiles)[4])
+        term = FakeTerminal()
+        view = CursesHandView(FakeScreen(), term, n, ATTRS)
+        view.render(tiles, keep, 0, None)
+        assert term.take() == ['text'] * n
+
+        for cursor in range(1, n):
+            view.render(tiles, keep, cursor, None)
+            assert term.take() == ['text'] * 2
+
+        view.render(tiles, keep, n - 1, n - 1)
+        assert term.take() == ['text']
+
+
+def test_optimal_move_writes_fixed_cells():
+    random.seed(2)
+    for n in (13, 40, 136):
+        for from_pos, to_pos, calls in play_optimal_moves(n, FakeTerminal(), 200):
+            # 行は端末側でずらし、書くのは動かした牌とカーソルが外れたセルだけ
+            assert calls.count('delete') == calls.count('insert') == 1
+            assert calls.count('text') <= 2
+
+
+def test_without_shift_rewrites_shifted_range():
+    random.seed(6)
+    for from_pos, to_pos, calls in play_optimal_moves(13, FakeTerminal(can_shift=False), 100):
+        assert 'delete' not in calls and 'insert' not in calls
+        assert calls.count('text') <= abs(from_pos - to_pos) + 1
+
+
+def test_screen_size_check():
+    _check_screen_size(FakeScreen(24, 80), 13)
+    # 136枚は 8 + 136 * 4 = 552 桁必要
+    _check_screen_size(FakeScreen(24, 552), 136)
+    with pytest.raises(TerminalError, match="552×7"):
+        _check_screen_size(FakeScreen(24, 551), 136)
+    # 操作説明が収まらない幅と、状態の行が収まらない高さ
+    with pytest.raises(TerminalError):
+        _check_screen_size(FakeScreen(24, 40), 1)
+    with pytest.raises(TerminalError):
+        _check_screen_size(FakeScreen(6, 80), 13)
+
+
+@pytest.fixture(scope='module')
+def xterm():
+    """xterm の terminfo で実際の制御シーケンスを作る"""
+    curses = pytest.importorskip('curses')
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        curses.setupterm('xterm', fd)
+    except curses.error:
+        pytest.skip("xterm の terminfo がない")
+    finally:
+        os.close(fd)
+
+
+class RecordingWriter(TerminfoWriter):
+    """書き出したバイト数を記録する TerminfoWriter"""
+
+    def __init__(self):
+        self.sent = 0
+        super().__init__(self._count)
+
+    def _count(self, data):
+        self.sent += len(data)
+
+    def take(self):
+        sent, self.sent = self.sent, 0
+        return sent
+
+
+def test_move_output_bytes_do_not_grow_with_hand(xterm):
+    random.seed(7)
+    worst = {}
+    for n in (13, 136):
+        term = RecordingWriter()
+        moves = play_optimal_moves(n, term, 200)
+        worst[n] = max(sent for _, _, sent in moves)
+        # 右端への移動も左端への移動も含まれている
+        assert any(to_pos == 0 for _, to_pos, _ in moves)
+        assert any(from_pos < to_pos for from_pos, to_pos, _ in moves)
+    # 差はカーソル移動の桁数だけ
+    assert worst[136] <= worst[13] + 8
+
+
+def test_track_keep_prefers_previous_order():
+    random.seed(3)
+    for _ in range(2000):
+        tiles = STANDARD_VARIANT.generate(13)
+        _, order, _, _, lis_indices = calculate_min_moves(tiles)
+        from_pos, to_pos = random.sample(range(13), 2)
+        tiles.insert(to_pos, tiles.pop(from_pos))
+
+        keep, new_order, min_moves = track_keep(tiles, set(lis_indices), order, from_pos, to_pos)
+
+        rank_map = STANDARD_VARIANT.rank_map(new_order)
+        kept = sorted(keep)
+        assert len(kept) == 13 - min_moves
+        assert all(rank_map[tiles[a]] <= rank_map[tiles[b]] for a, b in zip(kept, kept[1:]))
+        order_moves = 13 - calculate_min_moves(tiles, _single_order(order))[2]
+        if order_moves == min_moves:
+            assert new_order == order
+
+
+def _single_order(order):
+    """牌種順序を order に固定したバリアント"""
+    groups = dict(STANDARD_SPEC['groups'])
+    return compile_variant(dict(STANDARD_SPEC, group_order_free=False,
+                                groups=[(key, groups[key]) for key in order]))
+
+
+# 赤五（0m/0p/0s）を五と同順位に置いたバリアント
+RED_FIVE_VARIANT = compile_variant(dict(
+    STANDARD_SPEC, name='red-five',
+    copies_per_tile={'5m': 3, '0m': 1, '5p': 3, '0p': 1, '5s': 3, '0s': 1},
+    groups=[(suit, [f"{i}{suit}" for i in range(1, 5)] + [(f"5{suit}", f"0{suit}")]
+             + [f"{i}{suit}" for i in range(6, 10)]) for suit in ('m', 'p', 's')]
+    + [STANDARD_SPEC['groups'][3]]))
+
+
+def test_game_functions_follow_variant():
+    random.seed(5)
+    tiles = generate_random_tiles(136, RED_FIVE_VARIANT)
+    assert {'0m', '0p', '0s'} <= set(tiles)
+    assert is_sorted(sorted(tiles, key=lambda t: get_tile_sort_key(t, RED_FIVE_VARIANT)),
+                     RED_FIVE_VARIANT)
+    assert is_sorted(['0m', '5m', '6m'], RED_FIVE_VARIANT)
+    assert display_tile('0m') != display_tile('5m')
+
+    fixed = _single_order(('p', 'm', 's', 'z'))
+    assert is_sorted(['1p', '1m'], fixed)
+    assert not is_sorted(['1m', '1p'], fixed)
+
+    # 0m 5m 4m 6m の 4m を先頭へ：赤五と五は同順位なので完成する
+    order = ('m', 'p', 's', 'z')
+    tiles = ['4m', '0m', '5m', '6m']
+    assert track_keep(tiles, {0, 1, 3}, order, 2, 0, RED_FIVE_VARIANT) == ({0, 1, 2, 3}, order, 0)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ビット並列カーネルの枚数上限（BITPARALLEL_MAX_TILES）前後のテスト
+手数の多い逆順の手牌も含めて LIS カーネルと比べる
+"""
+
+import random
+
+import pytest
+
+from mahjong_sort import (BITPARALLEL_MAX_TILES, bitparallel_min_moves,
+                          calculate_min_moves, lis_min_moves)
+from mahjong_variant import STANDARD_SPEC, compile_variant
+
+# 上限を超える枚数の手牌を作れるよう、各牌を10枚にしたバリアント
+LARGE_VARIANT = compile_variant(dict(STANDARD_SPEC, name='large', copies=10))
+
+
+def test_kernels_agree_up_to_limit():
+    random.seed(4)
+    for n in (BITPARALLEL_MAX_TILES - 1, BITPARALLEL_MAX_TILES):
+        hands = [LARGE_VARIANT.generate(n) for _ in range(3)]
+        hands.append(sorted(hands[0], key=LARGE_VARIANT.sort_key, reverse=True))
+        for tiles in hands:
+            expected = lis_min_moves(tiles, LARGE_VARIANT)
+            assert bitparallel_min_moves(tiles, LARGE_VARIANT)[:3] == expected[:3]
+
+
+def test_over_limit_uses_lis_kernel():
+    random.seed(5)
+    tiles = LARGE_VARIANT.generate(BITPARALLEL_MAX_TILES + 1)
+    assert calculate_min_moves(tiles, LARGE_VARIANT) == lis_min_moves(tiles, LARGE_VARIANT)
+    with pytest.raises(ValueError):
+        bitparallel_min_moves(tiles, LARGE_VARIANT)